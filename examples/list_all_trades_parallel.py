@@ -0,0 +1,21 @@
+import pandas as pd
+from time import time
+
+from ledgerx import Trades
+
+
+# runs in a worker process, so it must be defined at module level
+def transform_func(data):
+    return pd.DataFrame.from_dict(data)
+
+
+# runs in the main process, in page order
+def callback_func(df):
+    epoch_time = int(time())
+    df.to_csv(f"trades_{epoch_time}.csv")
+
+
+if __name__ == "__main__":
+    Trades.list_all_incremental_return_parallel(
+        {"limit": 200}, callback_func, transform_func, workers=4
+    )
@@ -8,6 +8,14 @@ DELAY_SECONDS = 0.0
 # configurations
 api_key = None
 verify_ssl_certs = True
+coalesce_requests = False
+http_transport = None
+request_timeout = 30.0
+hedge_requests = False
+hedge_percentile = 95
+hedge_budget = 0.1
+circuit_breakers = False
+serve_stale_when_open = False
 
 # endpoints as classes
 from ledgerx.trades import Trades
@@ -1,15 +1,27 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from time import sleep
-from typing import List, Dict, Callable
+from typing import Any, List, Dict, Callable, Optional
 
 from ledgerx import DELAY_SECONDS
 from ledgerx.http_client import HttpClient
-from ledgerx.util import has_next_url
+from ledgerx.util import has_next_url, next_url_from_content
+
+
+def decode_page(content: bytes, transform: Optional[Callable] = None) -> Any:
+    """Decode a raw page and apply transform to its data. Runs in worker processes."""
+    data = json.loads(content)["data"]
+    if transform is None:
+        return data
+    return transform(data)
 
 
 class GenericResource:
     @classmethod
-    def next(cls, next_url: str):
-        res = HttpClient.get(next_url)
+    def next(cls, next_url: str, include_api_key: bool = False):
+        res = HttpClient.get(next_url, {}, include_api_key)
         return res.json()
 
     @classmethod
@@ -32,7 +44,7 @@ class GenericResource:
 
         while has_next_url(json_data):
             sleep(DELAY_SECONDS)
-            json_data = cls.next(json_data["meta"]["next"])
+            json_data = cls.next(json_data["meta"]["next"], include_api_key)
             elements.extend(json_data["data"])
         return elements
 
@@ -50,5 +62,70 @@ class GenericResource:
 
         while has_next_url(json_data):
             sleep(DELAY_SECONDS)
-            json_data = cls.next(json_data["meta"]["next"])
+            json_data = cls.next(json_data["meta"]["next"], include_api_key)
             callback(json_data["data"])
+
+    @classmethod
+    def list_all_incremental_return_parallel(
+        cls,
+        url: str,
+        params: Dict = {},
+        include_api_key: bool = False,
+        callback: Callable = None,
+        transform: Callable = None,
+        workers: int = None,
+        max_in_flight: int = None,
+    ) -> None:
+        """Paginate while decoding and transforming pages in a process pool.
+
+        The calling thread keeps downloading pages and only scans each raw body
+        for the next url. Decoding and transform run in worker processes, and
+        callback receives the transformed pages in page order on the calling
+        thread, as soon as they and every earlier page are ready.
+
+        The next url is read from the top-level "meta" object without decoding
+        the page when meta is the first or last key of the body. For any other
+        layout the whole page is decoded on the calling thread as well.
+
+        Args:
+            url (str): [description]
+            params (Dict, optional): [description]. Defaults to {}.
+            include_api_key (bool, optional): [description]. Defaults to False.
+            callback (Callable, optional): called with each transformed page. Defaults to None.
+            transform (Callable, optional): picklable (module level) function
+                applied to each page's data in a worker. Defaults to None.
+            workers (int, optional): process count. Defaults to os.cpu_count().
+            max_in_flight (int, optional): pages downloaded but not yet passed
+                to callback. Defaults to 2 * workers.
+        """
+        workers = workers or os.cpu_count() or 1
+        max_in_flight = max_in_flight or 2 * workers
+        in_flight = deque()
+
+        def deliver() -> None:
+            result = in_flight.popleft().result()
+            if callback is not None:
+                callback(result)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            try:
+                res = HttpClient.get(url, params, include_api_key)
+                while True:
+                    # stream finished pages out in order, block only when full
+                    while in_flight and (
+                        in_flight[0].done() or len(in_flight) >= max_in_flight
+                    ):
+                        deliver()
+                    in_flight.append(pool.submit(decode_page, res.content, transform))
+                    next_url = next_url_from_content(res.content)
+                    if next_url is None:
+                        break
+                    sleep(DELAY_SECONDS)
+                    res = HttpClient.get(next_url, {}, include_api_key)
+
+                while in_flight:
+                    deliver()
+            finally:
+                # stop pending work when a callback raises, eg to end pagination early
+                for future in in_flight:
+                    future.cancel()
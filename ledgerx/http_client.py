@@ -1,11 +1,30 @@
 import requests
+from time import monotonic
 from typing import Dict
+import ledgerx
+from ledgerx import resilience
+from ledgerx.resilience import CircuitOpenError, endpoint_for, latency_key_for
+from ledgerx.single_flight import SingleFlight, request_key
+from ledgerx.transport import RequestsTransport, Transport
 from ledgerx.util import gen_headers
 
+# shared by all threads when ledgerx.coalesce_requests is enabled
+single_flight = SingleFlight()
+
+# used when ledgerx.http_transport is not set
+default_transport = RequestsTransport()
+
+
+def get_transport() -> Transport:
+    return ledgerx.http_transport or default_transport
+
 
 class HttpClient:
     # TODO(weston) - handle rate limiting, https://docs.ledgerx.com/reference#rate-limits
 
+    # GET requests go through, in order and each only when enabled in ledgerx:
+    # coalesce_requests -> circuit_breakers -> hedge_requests -> transport
+
     @staticmethod
     def get(
         url: str, params: Dict = {}, include_api_key: bool = False
@@ -21,7 +40,72 @@ class HttpClient:
             requests.Response: [description]
         """
         headers = gen_headers(include_api_key)
-        res = requests.get(url, headers=headers, params=params)
+        if ledgerx.coalesce_requests:
+            key = request_key("GET", url, params, headers)
+            return single_flight.do(key, lambda: HttpClient._get(url, params, headers))
+        return HttpClient._get(url, params, headers)
+
+    @staticmethod
+    def _get(url: str, params: Dict, headers: Dict) -> requests.Response:
+        if not ledgerx.circuit_breakers:
+            return HttpClient._send_get(url, params, headers)
+
+        breaker = resilience.breakers[endpoint_for(url)]
+        key = request_key("GET", url, params, headers)
+        if not breaker.allow():
+            if ledgerx.serve_stale_when_open:
+                cached = resilience.response_cache.get(key)
+                if cached is not None:
+                    return cached
+            raise CircuitOpenError(f"circuit open for {endpoint_for(url)}")
+
+        try:
+            res = HttpClient._send_get(url, params, headers)
+        except requests.exceptions.HTTPError as e:
+            # only server errors indicate a degraded endpoint
+            if e.response is not None and e.response.status_code < 500:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            # anything else (timeouts, transport errors, interrupts) counts as a
+            # failure so a half open breaker never stays stuck
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        if ledgerx.serve_stale_when_open:
+            resilience.response_cache.put(key, res)
+        return res
+
+    @staticmethod
+    def _send_get(url: str, params: Dict, headers: Dict) -> requests.Response:
+        if not ledgerx.hedge_requests:
+            return HttpClient._request("GET", url, headers, params=params)
+
+        latency = resilience.latencies[latency_key_for(url)]
+
+        def send() -> requests.Response:
+            start = monotonic()
+            res = HttpClient._request("GET", url, headers, params=params)
+            latency.record(monotonic() - start)
+            return res
+
+        delay = latency.percentile(ledgerx.hedge_percentile)
+        return resilience.hedged_call(send, delay, ledgerx.hedge_budget)
+
+    @staticmethod
+    def _request(
+        method: str, url: str, headers: Dict, params: Dict = None, data: Dict = None
+    ) -> requests.Response:
+        res = get_transport().request(
+            method,
+            url,
+            headers=headers,
+            params=params,
+            data=data,
+            timeout=ledgerx.request_timeout,
+        )
         res.raise_for_status()
         return res
 
@@ -40,9 +124,7 @@ class HttpClient:
             requests.Response: [description]
         """
         headers = gen_headers(include_api_key)
-        res = requests.post(url, headers=headers, json=data)
-        res.raise_for_status()
-        return res
+        return HttpClient._request("POST", url, headers, data=data)
 
     @staticmethod
     def delete(
@@ -59,6 +141,4 @@ class HttpClient:
             [type]: [description]
         """
         headers = gen_headers(include_api_key)
-        res = requests.delete(url, params=params, headers=headers)
-        res.raise_for_status()
-        return res
+        return HttpClient._request("DELETE", url, headers, params=params)
@@ -0,0 +1,446 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from ledgerx.contracts import Contracts
+from ledgerx.positions import Positions
+from ledgerx.transactions import Transactions
+
+logger = logging.getLogger(__name__)
+
+
+class ContractPosition:
+    """Average cost position in a single contract.
+
+    size is signed (negative when short). Prices and pnl are in the units the
+    API reports prices in. avg_cost is None when the cost of the position is
+    unknown (its trade history does not add up to the server size); pnl on
+    that quantity is then not counted.
+    """
+
+    __slots__ = (
+        "contract_id",
+        "asset",
+        "size",
+        "avg_cost",
+        "realized_pnl",
+        "fees",
+        "mark",
+    )
+
+    def __init__(self, contract_id: int, asset: Optional[str] = None):
+        self.contract_id = contract_id
+        self.asset = asset
+        self.size = 0
+        self.avg_cost = 0.0
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+        self.mark = None
+
+    @property
+    def unrealized_pnl(self) -> float:
+        if self.mark is None or self.size == 0 or self.avg_cost is None:
+            return 0.0
+        return (self.mark - self.avg_cost) * self.size
+
+    def apply_fill(self, qty: int, price: float, fee: float = 0.0) -> float:
+        """Apply a fill and return the pnl it realized (net of fee).
+
+        Args:
+            qty (int): signed fill size, positive for buys
+            price (float): fill price
+            fee (float, optional): fee paid, negative for rebates. Defaults to 0.0.
+
+        Returns:
+            float: realized pnl of this fill
+        """
+        realized = -fee
+        self.fees += fee
+        self.realized_pnl += realized
+        if qty == 0:
+            return realized
+
+        if self.size == 0 or (self.size > 0) == (qty > 0):
+            size = self.size + qty
+            if self.size == 0:
+                self.avg_cost = price
+            elif self.avg_cost is not None:
+                cost = self.avg_cost * abs(self.size) + price * abs(qty)
+                self.avg_cost = cost / abs(size)
+        else:
+            if self.avg_cost is not None:
+                closed = min(abs(qty), abs(self.size))
+                direction = 1 if self.size > 0 else -1
+                pnl = (price - self.avg_cost) * closed * direction
+                realized += pnl
+                self.realized_pnl += pnl
+            size = self.size + qty
+            if size == 0:
+                self.avg_cost = 0.0
+            elif (size > 0) != (self.size > 0):
+                # flipped sides, the remainder opens at the fill price
+                self.avg_cost = price
+        self.size = size
+        return realized
+
+    def to_dict(self) -> Dict:
+        return dict(
+            contract_id=self.contract_id,
+            asset=self.asset,
+            size=self.size,
+            avg_cost=self.avg_cost,
+            realized_pnl=self.realized_pnl,
+            unrealized_pnl=self.unrealized_pnl,
+            fees=self.fees,
+            mark=self.mark,
+        )
+
+
+class Ledger:
+    """In-process position and pnl book.
+
+    Seed once from Positions and Transactions, then feed new fills with
+    apply_trade and new transactions with apply_transaction. Every event is
+    O(1): per-asset totals are updated by the delta of the one position it
+    touches. reconcile diffs local sizes against Positions.list_all.
+
+    HTTP requests are made without holding the ledger lock, so live updates
+    are never blocked on seeding or reconciliation.
+
+    The parse_* methods map API payloads to the values the ledger needs and
+    can be overridden if the payload shape differs.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.positions: Dict[int, ContractPosition] = {}
+        self.marks: Dict[int, float] = {}
+        self.balances: Dict[str, float] = defaultdict(float)
+        # net signed contract size per underlying asset
+        self.asset_sizes: Dict[str, int] = defaultdict(int)
+        self.asset_realized_pnl: Dict[str, float] = defaultdict(float)
+        self.asset_unrealized_pnl: Dict[str, float] = defaultdict(float)
+        self._seen_trades = set()
+        self._seen_transactions = set()
+        # contract id -> trades applied while that contract is being rebuilt
+        self._rebuilding: Dict[int, List[Dict]] = {}
+        self._timer_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._stopped: Optional[threading.Event] = None
+
+    # payload parsing
+
+    @staticmethod
+    def parse_position(position: Dict) -> Tuple[int, Optional[str], int]:
+        """Returns (contract_id, asset, signed size) for a Positions.list element."""
+        contract = position.get("contract", {})
+        contract_id = contract.get("id", position.get("contract_id"))
+        asset = contract.get("underlying_asset")
+        size = position.get("size", 0)
+        if position.get("type") == "short" and size > 0:
+            size = -size
+        return contract_id, asset, size
+
+    @staticmethod
+    def parse_trade(trade: Dict) -> Tuple[int, float, float]:
+        """Returns (signed size, price, fee) for a trade, bids are buys."""
+        size = trade["filled_size"]
+        qty = size if trade["side"] == "bid" else -size
+        fee = (trade.get("fee") or 0) - (trade.get("rebate") or 0)
+        return qty, trade["filled_price"], fee
+
+    @staticmethod
+    def parse_trade_asset(trade: Dict) -> Optional[str]:
+        """Returns the underlying asset of a trade's contract, if the payload has it."""
+        contract = trade.get("contract") or {}
+        return (
+            trade.get("underlying_asset")
+            or trade.get("asset")
+            or contract.get("underlying_asset")
+        )
+
+    @staticmethod
+    def parse_transaction(transaction: Dict) -> Tuple[str, float]:
+        """Returns (asset, signed amount) for a Transactions.list element."""
+        amount = transaction["amount"]
+        if (
+            transaction.get("debit_post_balance") is not None
+            and transaction.get("credit_post_balance") is None
+        ):
+            amount = -abs(amount)
+        return transaction["asset"], amount
+
+    # seeding and reconciliation
+
+    def seed(self) -> None:
+        """Build the book from Positions, per-contract trades and Transactions."""
+        for position in Positions.list_all():
+            self.seed_position(position)
+        for transaction in Transactions.list_all():
+            self.apply_transaction(transaction)
+
+    def seed_position(self, position: Dict) -> ContractPosition:
+        """Rebuild a contract's position from its trade history.
+
+        Trades are fetched and replayed into a new ContractPosition without the
+        lock held; the lock is only taken to swap it in. Live trades applied to
+        the contract meanwhile are carried over.
+
+        position may be older than the trade history, so when they disagree the
+        position is re-read with Contracts.retrieve_position. Only if the fresh
+        size still differs from the history (eg expiries or assignments) is the
+        size taken from the server, with its cost marked unknown.
+        """
+        contract_id, asset, size = self.parse_position(position)
+        with self._lock:
+            self._rebuilding.setdefault(contract_id, [])
+        try:
+            trades = Positions.list_all_trades(contract_id)
+            pos = ContractPosition(contract_id, asset)
+            trade_ids = set()
+            for trade in trades:
+                trade_id = trade.get("id")
+                if trade_id is not None:
+                    if trade_id in trade_ids:
+                        continue
+                    trade_ids.add(trade_id)
+                pos.apply_fill(*self.parse_trade(trade))
+
+            history_size = pos.size
+            with self._lock:
+                pending = self._pending_trades(contract_id, trade_ids)
+            pending_size = sum(self.parse_trade(trade)[0] for trade in pending)
+            server_size = size
+            if history_size + pending_size != server_size:
+                server_size = self.fetch_position_size(contract_id)
+
+            with self._lock:
+                # includes trades applied after the server size was read
+                pending = self._pending_trades(contract_id, trade_ids)
+                for trade in pending:
+                    pos.apply_fill(*self.parse_trade(trade))
+                if history_size + pending_size != server_size:
+                    late_size = pos.size - history_size - pending_size
+                    self._set_size(pos, server_size + late_size)
+                self._swap_position(pos)
+                self._seen_trades |= trade_ids
+            return pos
+        finally:
+            with self._lock:
+                self._rebuilding.pop(contract_id, None)
+
+    def fetch_position_size(self, contract_id: int) -> int:
+        """Re-read a single contract's signed position size from the server."""
+        res = Contracts.retrieve_position(contract_id)
+        position = res.get("data", res)
+        position.setdefault("contract_id", contract_id)
+        return self.parse_position(position)[2]
+
+    def reconcile(self, correct: bool = True) -> List[Dict]:
+        """Diff local sizes against Positions.list_all.
+
+        Args:
+            correct (bool, optional): re-seed mismatched contracts. Defaults to True.
+
+        Returns:
+            List[Dict]: one dict(contract_id, local, server) per mismatch
+        """
+        server = {}
+        for position in Positions.list_all():
+            contract_id, _, size = self.parse_position(position)
+            server[contract_id] = (size, position)
+
+        diffs = []
+        with self._lock:
+            for contract_id in set(server) | set(self.positions):
+                local = self.positions.get(contract_id)
+                local_size = local.size if local is not None else 0
+                server_size, position = server.get(contract_id, (0, None))
+                if local_size != server_size:
+                    diffs.append(
+                        dict(
+                            contract_id=contract_id,
+                            local=local_size,
+                            server=server_size,
+                        )
+                    )
+
+        if correct:
+            for diff in diffs:
+                contract_id = diff["contract_id"]
+                _, position = server.get(contract_id, (0, None))
+                if position is None:
+                    local = self.positions[contract_id]
+                    position = dict(
+                        contract=dict(id=contract_id, underlying_asset=local.asset),
+                        size=0,
+                    )
+                self.seed_position(position)
+        return diffs
+
+    def start_reconciliation(self, interval: float, callback=None) -> None:
+        """Call reconcile every interval seconds on a daemon thread.
+
+        Failed runs are logged and the next run is still scheduled.
+
+        Args:
+            interval (float): seconds between reconciliations
+            callback (Callable, optional): called with the diffs of each run. Defaults to None.
+        """
+        self.stop_reconciliation()
+        stopped = threading.Event()
+
+        def run():
+            try:
+                diffs = self.reconcile()
+                if callback is not None:
+                    callback(diffs)
+            except Exception:
+                logger.exception("ledger reconciliation failed")
+            finally:
+                schedule()
+
+        def schedule():
+            with self._timer_lock:
+                if stopped.is_set():
+                    return
+                self._timer = threading.Timer(interval, run)
+                self._timer.daemon = True
+                self._timer.start()
+
+        with self._timer_lock:
+            self._stopped = stopped
+        schedule()
+
+    def stop_reconciliation(self) -> None:
+        """Stop reconciling. A run in progress finishes but is not rescheduled."""
+        with self._timer_lock:
+            if self._stopped is not None:
+                self._stopped.set()
+                self._stopped = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    # incremental updates
+
+    def apply_trade(
+        self,
+        trade: Dict,
+        contract_id: Optional[int] = None,
+        asset: Optional[str] = None,
+    ) -> bool:
+        """Apply a fill. Trades already applied (by id) are ignored.
+
+        Args:
+            trade (Dict): trade payload
+            contract_id (int, optional): used when the trade has no contract_id. Defaults to None.
+            asset (str, optional): underlying asset, used when the trade payload
+                has none and the contract is not in the ledger yet. Defaults to None.
+
+        Raises:
+            ValueError: the contract is new and its asset is unknown
+
+        Returns:
+            bool: whether the trade was applied
+        """
+        trade_id = trade.get("id")
+        contract_id = trade.get("contract_id", contract_id)
+        asset = self.parse_trade_asset(trade) or asset
+        qty, price, fee = self.parse_trade(trade)
+        with self._lock:
+            if trade_id is not None:
+                if trade_id in self._seen_trades:
+                    return False
+            pos = self.positions.get(contract_id)
+            if pos is None:
+                if asset is None:
+                    raise ValueError(
+                        f"unknown asset for contract {contract_id}, pass asset="
+                    )
+                pos = ContractPosition(contract_id, asset)
+                pos.mark = self.marks.get(contract_id)
+                self.positions[contract_id] = pos
+            if trade_id is not None:
+                self._seen_trades.add(trade_id)
+            if contract_id in self._rebuilding:
+                self._rebuilding[contract_id].append(trade)
+            self._update(pos, lambda: pos.apply_fill(qty, price, fee))
+        return True
+
+    def apply_transaction(self, transaction: Dict) -> bool:
+        """Apply a debit or credit. Transactions already applied (by id) are ignored.
+
+        Returns:
+            bool: whether the transaction was applied
+        """
+        transaction_id = transaction.get("id")
+        asset, amount = self.parse_transaction(transaction)
+        with self._lock:
+            if transaction_id is not None:
+                if transaction_id in self._seen_transactions:
+                    return False
+                self._seen_transactions.add(transaction_id)
+            self.balances[asset] += amount
+        return True
+
+    def update_mark(self, contract_id: int, price: float) -> None:
+        """Set the price used for a contract's unrealized pnl."""
+        with self._lock:
+            self.marks[contract_id] = price
+            pos = self.positions.get(contract_id)
+            if pos is not None:
+                self._update(pos, lambda: setattr(pos, "mark", price))
+
+    # queries
+
+    def position(self, contract_id: int) -> Optional[ContractPosition]:
+        return self.positions.get(contract_id)
+
+    def asset_summary(self, asset: str) -> Dict:
+        with self._lock:
+            return dict(
+                asset=asset,
+                balance=self.balances.get(asset, 0.0),
+                size=self.asset_sizes.get(asset, 0),
+                realized_pnl=self.asset_realized_pnl.get(asset, 0.0),
+                unrealized_pnl=self.asset_unrealized_pnl.get(asset, 0.0),
+            )
+
+    # internals, called with the lock held
+
+    def _add_totals(self, pos: ContractPosition, sign: int) -> None:
+        self.asset_sizes[pos.asset] += sign * pos.size
+        self.asset_realized_pnl[pos.asset] += sign * pos.realized_pnl
+        self.asset_unrealized_pnl[pos.asset] += sign * pos.unrealized_pnl
+
+    def _update(self, pos: ContractPosition, change) -> None:
+        self._add_totals(pos, -1)
+        change()
+        self._add_totals(pos, 1)
+
+    def _swap_position(self, pos: ContractPosition) -> None:
+        old = self.positions.get(pos.contract_id)
+        if old is not None:
+            self._add_totals(old, -1)
+            pos.asset = pos.asset or old.asset
+        pos.mark = self.marks.get(pos.contract_id)
+        self.positions[pos.contract_id] = pos
+        self._add_totals(pos, 1)
+
+    def _pending_trades(self, contract_id: int, trade_ids: set) -> List[Dict]:
+        return [
+            trade
+            for trade in self._rebuilding.get(contract_id, [])
+            if trade.get("id") not in trade_ids
+        ]
+
+    @staticmethod
+    def _set_size(pos: ContractPosition, size: int) -> None:
+        """Force the size to the server's, the cost of that size is unknown."""
+        if size != pos.size:
+            pos.avg_cost = None
+        pos.size = size
+        if size == 0:
+            pos.avg_cost = 0.0
@@ -1,5 +1,6 @@
 from typing import List, Dict
 from ledgerx.http_client import HttpClient
+from ledgerx.generic_resource import GenericResource
 from ledgerx.util import gen_url
 
 
@@ -41,3 +42,32 @@ class Positions:
         return res.json()
 
     ### helper methods specific to this API client
+
+    @classmethod
+    def list_all(cls, params: Dict = {}) -> List[Dict]:
+        """Returns all your positions, following pagination.
+
+        Args:
+            params (Dict, optional): [description]. Defaults to {}.
+
+        Returns:
+            List[Dict]: [description]
+        """
+        include_api_key = True
+        url = gen_url("/trading/positions")
+        qps = {**cls.default_list_params, **params}
+        return GenericResource.list_all(url, qps, include_api_key)
+
+    @classmethod
+    def list_all_trades(cls, contract_id: int) -> List[Dict]:
+        """Returns all your trades for a given position, following pagination.
+
+        Args:
+            contract_id (int): LedgerX contract ID.
+
+        Returns:
+            List[Dict]: [description]
+        """
+        include_api_key = True
+        url = gen_url(f"/trading/positions/{contract_id}/trades")
+        return GenericResource.list_all(url, {}, include_api_key)
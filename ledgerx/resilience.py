@@ -0,0 +1,309 @@
+import copy
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    TimeoutError as FuturesTimeoutError,
+    wait,
+)
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from ledgerx import API_BASE, LEGACY_API_BASE
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    pass
+
+
+def endpoint_for(url: str) -> str:
+    """Group urls by the API they belong to, eg the legacy api vs the main api."""
+    for base in (LEGACY_API_BASE, API_BASE):
+        if url.startswith(base):
+            return base
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def latency_key_for(url: str) -> str:
+    """Group urls by path, so each endpoint has its own latency profile."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+class LatencyTracker:
+    """Rolling window of request latencies for one endpoint.
+
+    Args:
+        window (int, optional): number of samples kept. Defaults to 200.
+        min_samples (int, optional): samples needed before percentile returns a value. Defaults to 20.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Returns the p-th percentile latency in seconds, or None without enough samples."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        i = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+        return samples[i]
+
+
+class CircuitBreaker:
+    """Fail fast on an endpoint after repeated failures.
+
+    Closed: requests flow. After failure_threshold consecutive failures the
+    breaker opens and requests are rejected. After reset_timeout seconds one
+    trial request is let through (half open); its outcome closes or re-opens
+    the breaker. If no outcome is recorded within reset_timeout, another trial
+    is let through.
+
+    Args:
+        failure_threshold (int, optional): consecutive failures to open. Defaults to 5.
+        reset_timeout (float, optional): seconds before a trial request. Defaults to 30.0.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # _opened_at is also the start of the current trial when half open
+            if monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._opened_at = monotonic()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = monotonic()
+
+
+class ResponseCache:
+    """Recent successful responses, served while a breaker is open.
+
+    Only used when ledgerx.serve_stale_when_open is enabled. Entries expire
+    after max_age seconds and the cache holds at most max_bytes of bodies.
+    Served responses are copies marked with `stale = True` and a
+    "X-Ledgerx-Stale: true" header.
+
+    Args:
+        max_age (float, optional): seconds an entry can be served. Defaults to 300.0.
+        max_bytes (int, optional): total body size kept. Defaults to 16 MiB.
+    """
+
+    STALE_HEADER = "X-Ledgerx-Stale"
+
+    def __init__(self, max_age: float = 300.0, max_bytes: int = 16 * 1024 * 1024):
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._responses = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[requests.Response]:
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is None:
+                return None
+            stored_at, res = entry
+            if monotonic() - stored_at > self.max_age:
+                self._pop(key)
+                return None
+        stale = copy.copy(res)
+        stale.headers = CaseInsensitiveDict(res.headers)
+        stale.headers[self.STALE_HEADER] = "true"
+        stale.stale = True
+        return stale
+
+    def put(self, key: Hashable, res: requests.Response) -> None:
+        size = len(res.content or b"")
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._responses:
+                self._pop(key)
+            self._responses[key] = (monotonic(), res)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._responses)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._responses.clear()
+            self._bytes = 0
+
+    def _pop(self, key: Hashable) -> None:
+        _, res = self._responses.pop(key)
+        self._bytes -= len(res.content or b"")
+
+
+class HedgeBudget:
+    """Cap hedges to a fraction of recent requests.
+
+    Args:
+        window (int, optional): number of recent requests and hedges considered. Defaults to 200.
+    """
+
+    def __init__(self, window: int = 200):
+        # 0 for a request, 1 for a hedge
+        self._events = deque(maxlen=window)
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._append(0)
+
+    def try_hedge(self, ratio: float) -> bool:
+        """Record a hedge if it keeps hedges within ratio of recent requests."""
+        with self._lock:
+            requests_seen = len(self._events) - self._hedges
+            if self._hedges + 1 > ratio * requests_seen:
+                return False
+            self._append(1)
+            return True
+
+    def _append(self, event: int) -> None:
+        if len(self._events) == self._events.maxlen:
+            self._hedges -= self._events[0]
+        self._events.append(event)
+        self._hedges += event
+
+
+class _Registry:
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self._items: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, endpoint: str) -> Any:
+        with self._lock:
+            item = self._items.get(endpoint)
+            if item is None:
+                item = self._items[endpoint] = self.factory()
+            return item
+
+    def __setitem__(self, endpoint: str, item: Any) -> None:
+        with self._lock:
+            self._items[endpoint] = item
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+# per-endpoint state, replace entries to customize eg
+# breakers[LEGACY_API_BASE] = CircuitBreaker(failure_threshold=3)
+breakers = _Registry(CircuitBreaker)
+latencies = _Registry(LatencyTracker)
+response_cache = ResponseCache()
+hedge_budget = HedgeBudget()
+hedge_stats = dict(hedged=0, hedge_wins=0, over_budget=0)
+_hedge_stats_lock = threading.Lock()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=16)
+        return _executor
+
+
+def _run_in_thread(fn: Callable[[], Any]) -> Future:
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def hedged_call(
+    fn: Callable[[], Any], delay: Optional[float], budget: float = 0.1
+) -> Any:
+    """Call fn, and call it again if the first call takes longer than delay.
+
+    The first attempt starts immediately on its own thread, so the hedge delay
+    is never spent waiting for a worker. Only hedges run on the shared pool,
+    and at most `budget` of recent calls are hedged. Whichever call succeeds
+    first wins; the other is left to finish in the background and its result
+    is dropped. Only use for idempotent requests.
+
+    Args:
+        fn (Callable[[], Any]): request function
+        delay (Optional[float]): seconds before hedging, None disables hedging
+        budget (float, optional): max fraction of calls hedged. Defaults to 0.1.
+
+    Returns:
+        Any: result of the first successful call
+    """
+    if delay is None:
+        return fn()
+    hedge_budget.record_request()
+    first = _run_in_thread(fn)
+    try:
+        return first.result(timeout=delay)
+    except FuturesTimeoutError:
+        pass
+
+    if not hedge_budget.try_hedge(budget):
+        with _hedge_stats_lock:
+            hedge_stats["over_budget"] += 1
+        return first.result()
+
+    with _hedge_stats_lock:
+        hedge_stats["hedged"] += 1
+    second = _get_executor().submit(fn)
+    done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+    winner = done.pop()
+    if winner.exception() is not None:
+        winner = second if winner is first else first
+    if winner is second:
+        with _hedge_stats_lock:
+            hedge_stats["hedge_wins"] += 1
+    return winner.result()
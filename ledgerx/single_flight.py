@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from ledgerx.util import encode_query
+
+
+def request_key(method: str, url: str, params: Dict = {}, headers: Dict = {}) -> Tuple:
+    """Build the coalescing key for a request.
+
+    Requests are identical when they share method, url, query params and auth
+    identity (the Authorization header), so responses for different api keys
+    are never shared.
+
+    Args:
+        method (str): http method, eg "GET"
+        url (str): request url
+        params (Dict, optional): query params. Defaults to {}.
+        headers (Dict, optional): request headers. Defaults to {}.
+
+    Returns:
+        Tuple: hashable key
+    """
+    auth = (headers or {}).get("Authorization")
+    return (method.upper(), url, encode_query(params), auth)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls across threads.
+
+    The first caller for a key executes the function; callers arriving while
+    it is in flight block and receive the same result (or exception).
+
+    HttpClient shares the requests.Response, not its decoded json: each caller
+    still runs .json() itself, so callers never mutate each other's data.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Execute fn once per in-flight key and share its outcome.
+
+        Args:
+            key (Hashable): coalescing key, see request_key
+            fn (Callable[[], Any]): function executing the request
+
+        Returns:
+            Any: return value of fn
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(
+                calls=self.calls, executed=self.executed, coalesced=self.coalesced
+            )
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.executed = 0
+            self.coalesced = 0
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent identical coroutines within one event loop.
+
+    Followers await the leader's task, so cancelling a follower does not
+    cancel the shared request.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn once per in-flight key and share its outcome.
+
+        Args:
+            key (Hashable): coalescing key, see request_key
+            fn (Callable[[], Awaitable[Any]]): coroutine function executing the request
+
+        Returns:
+            Any: result of the awaited coroutine
+        """
+        self.calls += 1
+        task = self._tasks.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def stats(self) -> Dict[str, int]:
+        return dict(calls=self.calls, executed=self.executed, coalesced=self.coalesced)
+
+    def reset_stats(self) -> None:
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
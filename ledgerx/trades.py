@@ -71,6 +71,39 @@ class Trades:
             url, params, include_api_key, callback
         )
 
+    @classmethod
+    def list_all_incremental_return_parallel(
+        cls,
+        params: Dict = {},
+        callback: Callable = None,
+        transform: Callable = None,
+        workers: int = None,
+        max_in_flight: int = None,
+    ) -> None:
+        """List all trades, decoding and transforming pages in a process pool.
+
+        See GenericResource.list_all_incremental_return_parallel for more info.
+
+        Args:
+            params (Dict, optional): [description]. Defaults to {}.
+            callback (Callable, optional): called with each transformed page, in page order. Defaults to None.
+            transform (Callable, optional): module level function run on each page in a worker process. Defaults to None.
+            workers (int, optional): process count. Defaults to None.
+            max_in_flight (int, optional): bound on downloaded, undelivered pages. Defaults to None.
+        """
+        include_api_key = False
+        url = gen_url("/trading/trades/global")
+        request_params = {**cls.default_list_all_params, **params}
+        return GenericResource.list_all_incremental_return_parallel(
+            url,
+            request_params,
+            include_api_key,
+            callback=callback,
+            transform=transform,
+            workers=workers,
+            max_in_flight=max_in_flight,
+        )
+
     @classmethod
     def next(cls, next_url: str):
         res = HttpClient.get(next_url)
@@ -1,4 +1,5 @@
 from ledgerx.http_client import HttpClient
+from ledgerx.generic_resource import GenericResource
 from typing import List, Dict
 from ledgerx.util import gen_url
 
@@ -25,3 +26,18 @@ class Transactions:
         return res.json()
 
     ### helper methods specific to this API client
+
+    @classmethod
+    def list_all(cls, params: Dict = {}) -> List[Dict]:
+        """Returns all debits and credits to your accounts, following pagination.
+
+        Args:
+            params (Dict, optional): [description]. Defaults to {}.
+
+        Returns:
+            List[Dict]: [description]
+        """
+        include_api_key = True
+        url = gen_url("/funds/transactions")
+        qps = {**cls.default_list_params, **params}
+        return GenericResource.list_all(url, qps, include_api_key)
@@ -0,0 +1,225 @@
+import json
+import mmap
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import timedelta
+from time import monotonic, sleep
+from typing import Dict, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from ledgerx.util import encode_query
+
+
+class ReplayMissError(KeyError):
+    pass
+
+
+def transport_key(method: str, url: str, params: Dict = None, data: Dict = None) -> str:
+    """Build the lookup key used to match replayed requests.
+
+    Headers (and therefore the api key) are intentionally excluded so a log
+    recorded with credentials can be replayed without them.
+
+    Args:
+        method (str): http method
+        url (str): request url
+        params (Dict, optional): query params. Defaults to None.
+        data (Dict, optional): json body. Defaults to None.
+
+    Returns:
+        str: canonical key
+    """
+    return json.dumps(
+        [method.upper(), url, encode_query(params), data or None],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+class Transport(ABC):
+    """Interface used by HttpClient to send requests.
+
+    timeout is in seconds, None waits forever.
+    """
+
+    @abstractmethod
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict = None,
+        params: Dict = None,
+        data: Dict = None,
+        timeout: float = None,
+    ) -> requests.Response:
+        pass
+
+
+class RequestsTransport(Transport):
+    """Default transport, sends requests over the network via requests."""
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict = None,
+        params: Dict = None,
+        data: Dict = None,
+        timeout: float = None,
+    ) -> requests.Response:
+        return requests.request(
+            method, url, headers=headers, params=params, json=data, timeout=timeout
+        )
+
+
+class RecordingTransport(Transport):
+    """Send requests through another transport and record every response.
+
+    Response bodies are appended to `path` and one json line per response is
+    appended to the `path + ".idx"` index, holding the key, status, a few
+    headers and the (offset, length) of the body.
+
+    Args:
+        path (str): log file path
+        transport (Transport, optional): transport doing the real requests.
+            Defaults to RequestsTransport().
+    """
+
+    recorded_headers = ("Content-Type",)
+
+    def __init__(self, path: str, transport: Optional[Transport] = None):
+        self.path = path
+        self.transport = transport or RequestsTransport()
+        self._lock = threading.Lock()
+        self._data = open(path, "ab")
+        self._index = open(index_path(path), "a", encoding="utf-8")
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict = None,
+        params: Dict = None,
+        data: Dict = None,
+        timeout: float = None,
+    ) -> requests.Response:
+        start = monotonic()
+        res = self.transport.request(method, url, headers, params, data, timeout)
+        elapsed = monotonic() - start
+        body = res.content or b""
+        entry = dict(
+            k=transport_key(method, url, params, data),
+            s=res.status_code,
+            r=res.reason,
+            u=res.url,
+            h={h: res.headers[h] for h in self.recorded_headers if h in res.headers},
+            t=round(elapsed, 6),
+        )
+        with self._lock:
+            entry["o"] = self._data.tell()
+            entry["n"] = len(body)
+            self._data.write(body)
+            self._data.flush()
+            self._index.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._index.flush()
+        return res
+
+    def close(self) -> None:
+        with self._lock:
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ReplayTransport(Transport):
+    """Serve responses from a log written by RecordingTransport.
+
+    The body file is memory-mapped and responses are sliced out of it on
+    demand. Repeated identical requests are served in recorded order; once
+    exhausted, the last recorded response for that key keeps being served.
+
+    Args:
+        path (str): log file path
+        speed (float, optional): None replays as fast as possible, otherwise
+            each response is delayed by its recorded latency divided by speed
+            (1.0 is real time, 10.0 is ten times faster). Defaults to None.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = None):
+        self.path = path
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+        with open(index_path(path), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["k"]].append(entry)
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._buffer = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if size > 0
+            else b""
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict = None,
+        params: Dict = None,
+        data: Dict = None,
+        timeout: float = None,
+    ) -> requests.Response:
+        key = transport_key(method, url, params, data)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise ReplayMissError(f"no recorded response for {method} {url}")
+            i = self._cursors[key]
+            entry = entries[min(i, len(entries) - 1)]
+            self._cursors[key] = i + 1
+
+        if self.speed:
+            sleep(entry["t"] / self.speed)
+
+        res = requests.Response()
+        res.status_code = entry["s"]
+        res.reason = entry.get("r")
+        res.url = entry.get("u") or url
+        res.headers = CaseInsensitiveDict(entry.get("h", {}))
+        res.encoding = "utf-8"
+        res.elapsed = timedelta(seconds=entry["t"])
+        res._content = self._buffer[entry["o"] : entry["o"] + entry["n"]]
+        return res
+
+    def rewind(self) -> None:
+        """Start serving every key from its first recorded response again."""
+        with self._lock:
+            self._cursors.clear()
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def index_path(path: str) -> str:
+    return f"{path}.idx"
@@ -1,4 +1,7 @@
-from typing import Dict, List, Any
+import json
+import re
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlencode
 from ledgerx import API_BASE, LEGACY_API_BASE
 import ledgerx
 
@@ -20,6 +23,27 @@ def gen_legacy_url(path: str) -> str:
     return f"{LEGACY_API_BASE}{path}"
 
 
+def encode_query(params: Dict = None) -> str:
+    """Encode params the way requests puts them on the wire, in key order.
+
+    Like requests, None values (and None items of lists) are dropped.
+
+    Args:
+        params (Dict, optional): query params. Defaults to None.
+
+    Returns:
+        str: query string, eg "a=1&a=2&b=x"
+    """
+    items = []
+    for key, value in sorted((params or {}).items(), key=lambda kv: str(kv[0])):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = [v for v in value if v is not None]
+        items.append((key, value))
+    return urlencode(items, doseq=True)
+
+
 def has_next_url(response_data: Dict) -> bool:
     if "meta" in response_data:
         if "next" in response_data["meta"]:
@@ -27,6 +51,61 @@ def has_next_url(response_data: Dict) -> bool:
                 return True
 
 
+# a "meta" key that is the first key of the top-level object
+META_FIRST_PATTERN = re.compile(r'\A\s*\{\s*"meta"\s*:\s*')
+META_COLON_PATTERN = re.compile(r"\s*:\s*")
+
+
+def _top_level_meta(text: str) -> Optional[Dict]:
+    """Decode only the top-level "meta" object when it is the first or last key.
+
+    Returns None when meta cannot be located that way.
+    """
+    decoder = json.JSONDecoder()
+    try:
+        match = META_FIRST_PATTERN.match(text)
+        if match is not None:
+            meta, _ = decoder.raw_decode(text, match.end())
+            return meta if isinstance(meta, dict) else None
+
+        # last key of the top-level object: preceded by "{" or "," and its
+        # value is followed only by the closing "}"
+        start = text.rfind('"meta"')
+        if start < 0 or text[:start].rstrip()[-1:] not in ("{", ","):
+            return None
+        colon = META_COLON_PATTERN.match(text, start + len('"meta"'))
+        if colon is None:
+            return None
+        meta, end = decoder.raw_decode(text, colon.end())
+        if text[end:].strip() != "}" or not isinstance(meta, dict):
+            return None
+        return meta
+    except ValueError:
+        return None
+
+
+def next_url_from_content(content: bytes) -> Optional[str]:
+    """Extract meta.next from a raw response body without decoding the page.
+
+    Only the top-level "meta" object is decoded when it is the first or last
+    key; otherwise the whole body is decoded.
+
+    Args:
+        content (bytes): raw json response body
+
+    Returns:
+        Optional[str]: next url, or None on the last page
+    """
+    text = content.decode("utf-8")
+    meta = _top_level_meta(text)
+    if meta is None:
+        json_data = json.loads(text)
+        meta = json_data.get("meta") if isinstance(json_data, dict) else None
+    if not isinstance(meta, dict):
+        return None
+    return meta.get("next")
+
+
 def unique_values_from_key(elements: List[Dict], key: str) -> List[Any]:
     values = []
     for el in elements:
@@ -0,0 +1,86 @@
+import time
+
+import requests_mock
+
+from ledgerx.generic_resource import GenericResource
+from ledgerx.http_client import HttpClient
+
+
+def count_elements(data):
+    return len(data)
+
+
+def test_list_all_incremental_return_parallel():
+    uri = "https://api.ledgerx.com/trading/trades/global"
+    pages = [
+        {
+            "meta": {"next": f"{uri}?page={i + 1}" if i < 4 else None},
+            "data": [i] * (i + 1),
+        }
+        for i in range(5)
+    ]
+    results = []
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", uri, json=pages[0])
+        for i in range(1, 5):
+            m.register_uri("GET", f"{uri}?page={i}", json=pages[i])
+        GenericResource.list_all_incremental_return_parallel(
+            uri,
+            callback=results.append,
+            transform=count_elements,
+            workers=2,
+            max_in_flight=2,
+        )
+    assert results == [1, 2, 3, 4, 5]
+
+
+def test_list_all_incremental_return_parallel_streams_results(monkeypatch):
+    uri = "https://api.ledgerx.com/trading/trades/global"
+    delivered = []
+    fetched = []
+
+    def fetch_hook(request, context):
+        fetched.append(request.url)
+        # page 1 must reach the callback before page 3 is requested, even
+        # though max_in_flight allows far more pages in flight
+        if len(fetched) == 3:
+            deadline = time.time() + 5
+            while not delivered and time.time() < deadline:
+                time.sleep(0.01)
+            assert delivered
+        page = len(fetched)
+        next_url = f"{uri}?page={page + 1}" if page < 3 else None
+        return {"meta": {"next": next_url}, "data": [page]}
+
+    def fetch_page(url, params={}, include_api_key=False):
+        # give the worker time to finish the previous page
+        time.sleep(0.2)
+        return real_get(url, params, include_api_key)
+
+    real_get = HttpClient.get
+    monkeypatch.setattr(HttpClient, "get", staticmethod(fetch_page))
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", uri, json=fetch_hook)
+        GenericResource.list_all_incremental_return_parallel(
+            uri,
+            callback=delivered.append,
+            transform=count_elements,
+            workers=1,
+            max_in_flight=10,
+        )
+    assert delivered == [1, 1, 1]
+
+
+def test_list_all_incremental_return_sends_api_key_on_every_page():
+    uri = "https://api.ledgerx.com/funds/transactions"
+    with requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET", uri, json={"meta": {"next": f"{uri}?page=2"}, "data": [1]}
+        )
+        m.register_uri("GET", f"{uri}?page=2", json={"meta": {}, "data": [2]})
+        pages = []
+        GenericResource.list_all_incremental_return(
+            uri, {}, include_api_key=True, callback=pages.append
+        )
+    assert pages == [[1], [2]]
+    assert all("Authorization" in r.headers for r in m.request_history)
@@ -0,0 +1,221 @@
+import threading
+
+import pytest
+import requests_mock
+
+from ledgerx.ledger import ContractPosition, Ledger
+from ledgerx.util import gen_url
+
+
+def trade(id, side, size, price, contract_id=1, fee=0, asset="CBTC"):
+    return dict(
+        id=id,
+        contract_id=contract_id,
+        side=side,
+        filled_size=size,
+        filled_price=price,
+        fee=fee,
+        underlying_asset=asset,
+    )
+
+
+def position(contract_id, size, type="long", asset="CBTC"):
+    return dict(
+        contract=dict(id=contract_id, underlying_asset=asset), size=size, type=type
+    )
+
+
+def test_contract_position_average_cost():
+    pos = ContractPosition(1)
+    pos.apply_fill(2, 100)
+    pos.apply_fill(2, 200)
+    assert pos.size == 4
+    assert pos.avg_cost == 150
+    assert pos.apply_fill(-1, 250) == 100
+    assert pos.avg_cost == 150
+    # flip short, remainder opens at fill price
+    pos.apply_fill(-5, 120)
+    assert pos.size == -2
+    assert pos.avg_cost == 120
+    assert pos.realized_pnl == 100 - 90
+    pos.mark = 100
+    assert pos.unrealized_pnl == 40
+
+
+def test_contract_position_zero_fill():
+    pos = ContractPosition(1)
+    assert pos.apply_fill(0, 100, fee=1) == -1
+    assert pos.size == 0
+    assert pos.avg_cost == 0
+
+
+def test_ledger_incremental():
+    ledger = Ledger()
+    ledger.update_mark(1, 110)
+    assert ledger.apply_trade(trade(1, "bid", 2, 100, fee=1))
+    assert not ledger.apply_trade(trade(1, "bid", 2, 100, fee=1))
+    assert ledger.asset_unrealized_pnl["CBTC"] == 20
+    ledger.apply_trade(trade(2, "ask", 1, 130))
+    ledger.apply_trade(trade(3, "ask", 3, 50, contract_id=2, asset="ETH"))
+    assert ledger.position(1).size == 1
+    assert ledger.asset_summary("CBTC") == dict(
+        asset="CBTC", balance=0.0, size=1, realized_pnl=30 - 1, unrealized_pnl=10
+    )
+    assert ledger.asset_summary("ETH")["size"] == -3
+
+    ledger.apply_transaction(dict(id=9, asset="USD", amount=500))
+    ledger.apply_transaction(
+        dict(id=10, asset="USD", amount=200, debit_post_balance=300)
+    )
+    assert ledger.asset_summary("USD")["balance"] == 300
+
+
+def test_ledger_requires_asset_for_new_contracts():
+    ledger = Ledger()
+    fill = trade(1, "bid", 1, 100)
+    del fill["underlying_asset"]
+    with pytest.raises(ValueError):
+        ledger.apply_trade(fill)
+    assert ledger.apply_trade(fill, asset="CBTC")
+    assert ledger.position(1).asset == "CBTC"
+
+
+def test_ledger_seed_and_reconcile():
+    trades = [trade(1, "ask", 2, 100), trade(2, "bid", 1, 80)]
+    with requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET",
+            gen_url("/trading/positions"),
+            json=dict(data=[position(1, 1, "short")]),
+        )
+        m.register_uri(
+            "GET", gen_url("/trading/positions/1/trades"), json=dict(data=trades)
+        )
+        m.register_uri("GET", gen_url("/funds/transactions"), json=dict(data=[]))
+        ledger = Ledger()
+        ledger.seed()
+        assert ledger.position(1).size == -1
+        assert ledger.asset_summary("CBTC")["realized_pnl"] == 20
+
+        assert ledger.reconcile() == []
+        ledger.apply_trade(trade(3, "ask", 1, 90))
+        assert ledger.reconcile() == [dict(contract_id=1, local=-2, server=-1)]
+        assert ledger.position(1).size == -1
+        assert ledger.asset_summary("CBTC")["realized_pnl"] == 20
+        assert ledger.asset_summary("CBTC")["size"] == -1
+
+
+def test_ledger_reads_every_page():
+    next_url = gen_url("/trading/positions?cursor=2")
+    with requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET",
+            gen_url("/trading/positions"),
+            json=dict(meta=dict(next=next_url), data=[position(1, 1)]),
+        )
+        m.register_uri(
+            "GET",
+            next_url,
+            json=dict(meta=dict(next=None), data=[position(2, 2)]),
+        )
+        for contract_id, size in ((1, 1), (2, 2)):
+            m.register_uri(
+                "GET",
+                gen_url(f"/trading/positions/{contract_id}/trades"),
+                json=dict(
+                    data=[trade(contract_id, "bid", size, 10, contract_id=contract_id)]
+                ),
+            )
+        m.register_uri("GET", gen_url("/funds/transactions"), json=dict(data=[]))
+        ledger = Ledger()
+        ledger.seed()
+        assert ledger.position(2).size == 2
+        # second page positions are not treated as missing on the server
+        assert ledger.reconcile() == []
+        assert ledger.position(2).size == 2
+        assert ledger.asset_summary("CBTC")["size"] == 3
+        # follow-up pages are requested with the api key
+        assert "Authorization" in m.request_history[1].headers
+
+
+def test_stop_reconciliation_during_run(monkeypatch):
+    ledger = Ledger()
+    running = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def reconcile():
+        runs.append(1)
+        running.set()
+        release.wait(5)
+        raise RuntimeError("network down")
+
+    monkeypatch.setattr(ledger, "reconcile", reconcile)
+    ledger.start_reconciliation(0.001)
+    assert running.wait(5)
+    ledger.stop_reconciliation()
+    release.set()
+    threading.Event().wait(0.05)
+    assert runs == [1]
+    assert ledger._timer is None or not ledger._timer.is_alive()
+
+
+def test_seed_position_keeps_live_trades_during_fetch(monkeypatch):
+    from ledgerx.positions import Positions
+
+    ledger = Ledger()
+
+    def list_all_trades(contract_id):
+        # a live fill lands while the history is being fetched
+        ledger.apply_trade(trade(9, "bid", 1, 50))
+        return [trade(1, "bid", 2, 100)]
+
+    monkeypatch.setattr(Positions, "list_all_trades", list_all_trades)
+    # the position snapshot predates the live fill, the re-read includes it
+    monkeypatch.setattr(ledger, "fetch_position_size", lambda contract_id: 3)
+    ledger.seed_position(position(1, 2))
+    assert ledger.position(1).size == 3
+    assert ledger.asset_summary("CBTC")["size"] == 3
+
+
+def test_reconcile_rereads_stale_position_snapshot():
+    trades = [trade(1, "bid", 1, 100), trade(2, "bid", 1, 110)]
+    with requests_mock.Mocker() as m:
+        # the list snapshot is taken before the second fill
+        m.register_uri(
+            "GET", gen_url("/trading/positions"), json=dict(data=[position(1, 1)])
+        )
+        m.register_uri(
+            "GET", gen_url("/trading/positions/1/trades"), json=dict(data=trades)
+        )
+        m.register_uri(
+            "GET",
+            gen_url("/trading/contracts/1/position"),
+            json=dict(data=position(1, 2)),
+        )
+        ledger = Ledger()
+        for fill in trades:
+            ledger.apply_trade(fill)
+        ledger.reconcile()
+        assert ledger.position(1).size == 2
+        assert ledger.position(1).avg_cost == 105
+
+
+def test_seed_position_with_unexplained_size_has_unknown_cost():
+    trades = [trade(1, "bid", 1, 100), trade(2, "ask", 1, 110)]
+    with requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET", gen_url("/trading/positions/1/trades"), json=dict(data=trades)
+        )
+        m.register_uri(
+            "GET",
+            gen_url("/trading/contracts/1/position"),
+            json=dict(data=position(1, 5)),
+        )
+        ledger = Ledger()
+        ledger.update_mark(1, 120)
+        pos = ledger.seed_position(position(1, 5))
+    assert pos.size == 5
+    assert pos.avg_cost is None
+    assert pos.unrealized_pnl == 0.0
+    assert ledger.asset_summary("CBTC")["realized_pnl"] == 10
@@ -0,0 +1,240 @@
+import threading
+import time
+
+import pytest
+import requests
+import requests_mock
+
+import ledgerx
+from ledgerx import resilience
+from ledgerx.http_client import HttpClient
+from ledgerx.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HedgeBudget,
+    LatencyTracker,
+    ResponseCache,
+    endpoint_for,
+    hedged_call,
+    latency_key_for,
+)
+
+
+def test_endpoint_for():
+    assert (
+        endpoint_for("https://trade.ledgerx.com/api/orders") == ledgerx.LEGACY_API_BASE
+    )
+    assert endpoint_for("https://api.ledgerx.com/trading/trades") == ledgerx.API_BASE
+    assert endpoint_for("https://google.com/a/b") == "https://google.com"
+
+
+def test_latency_key_for():
+    assert (
+        latency_key_for("https://api.ledgerx.com/trading/contracts?active=true")
+        == "https://api.ledgerx.com/trading/contracts"
+    )
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    assert tracker.percentile(95) is None
+    for i in range(1, 101):
+        tracker.record(i / 100.0)
+    assert tracker.percentile(50) == pytest.approx(0.5, abs=0.02)
+    assert tracker.percentile(95) == pytest.approx(0.95, abs=0.02)
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    # reset_timeout elapsed, trial request allowed
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+
+def test_hedged_call_uses_faster_response():
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    assert hedged_call(fn, 0.01, budget=1.0) == "fast"
+    release.set()
+    assert len(calls) == 2
+
+
+def test_hedged_call_without_delay():
+    assert hedged_call(lambda: "ok", None) == "ok"
+
+
+def test_http_client_circuit_breaker(monkeypatch):
+    monkeypatch.setattr(ledgerx, "circuit_breakers", True)
+    monkeypatch.setattr(ledgerx, "serve_stale_when_open", True)
+    resilience.breakers.clear()
+    resilience.response_cache.clear()
+    resilience.breakers[ledgerx.API_BASE] = CircuitBreaker(
+        failure_threshold=2, reset_timeout=60.0
+    )
+    uri = "https://api.ledgerx.com/trading/contracts"
+    other_uri = "https://api.ledgerx.com/trading/positions"
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", uri, [{"json": {"data": [1]}}, {"status_code": 503}])
+        m.register_uri("GET", other_uri, status_code=503)
+        assert HttpClient.get(uri).json() == {"data": [1]}
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.HTTPError):
+                HttpClient.get(other_uri)
+        # open, cached response is served without a request
+        call_count = m.call_count
+        stale = HttpClient.get(uri)
+        assert stale.json() == {"data": [1]}
+        assert stale.stale
+        assert stale.headers[ResponseCache.STALE_HEADER] == "true"
+        with pytest.raises(CircuitOpenError):
+            HttpClient.get(other_uri)
+        assert m.call_count == call_count
+    resilience.breakers.clear()
+    resilience.response_cache.clear()
+
+
+def test_http_client_client_errors_do_not_trip_breaker(monkeypatch):
+    monkeypatch.setattr(ledgerx, "circuit_breakers", True)
+    resilience.breakers.clear()
+    uri = "https://api.ledgerx.com/trading/contracts"
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", uri, status_code=404)
+        for _ in range(10):
+            with pytest.raises(requests.exceptions.HTTPError):
+                HttpClient.get(uri)
+    assert resilience.breakers[ledgerx.API_BASE].state == CircuitBreaker.CLOSED
+    resilience.breakers.clear()
+
+
+def test_half_open_breaker_recovers_from_non_http_errors(monkeypatch):
+    monkeypatch.setattr(ledgerx, "circuit_breakers", True)
+    resilience.breakers.clear()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    resilience.breakers[ledgerx.API_BASE] = breaker
+    uri = "https://api.ledgerx.com/trading/contracts"
+    with requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET",
+            uri,
+            [
+                {"status_code": 503},
+                {"exc": ValueError("bad transport")},
+                {"json": {"data": []}},
+            ],
+        )
+        with pytest.raises(requests.exceptions.HTTPError):
+            HttpClient.get(uri)
+        assert breaker.state == CircuitBreaker.OPEN
+        # the half open trial fails with a non-requests error
+        with pytest.raises(ValueError):
+            HttpClient.get(uri)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert HttpClient.get(uri).json() == {"data": []}
+        assert breaker.state == CircuitBreaker.CLOSED
+    resilience.breakers.clear()
+
+
+def test_half_open_breaker_expires_without_outcome():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # no outcome recorded for the trial, another one is let through
+    assert breaker.allow()
+
+
+def test_open_breaker_does_not_serve_cache_unless_enabled(monkeypatch):
+    monkeypatch.setattr(ledgerx, "circuit_breakers", True)
+    resilience.breakers.clear()
+    resilience.response_cache.clear()
+    resilience.breakers[ledgerx.API_BASE] = CircuitBreaker(
+        failure_threshold=1, reset_timeout=60.0
+    )
+    uri = "https://api.ledgerx.com/trading/contracts"
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", uri, [{"json": {"data": [1]}}, {"status_code": 503}])
+        HttpClient.get(uri)
+        with pytest.raises(requests.exceptions.HTTPError):
+            HttpClient.get(uri)
+        with pytest.raises(CircuitOpenError):
+            HttpClient.get(uri)
+    resilience.breakers.clear()
+
+
+def test_response_cache_limits():
+    def response(body):
+        res = requests.Response()
+        res._content = body
+        return res
+
+    cache = ResponseCache(max_age=60.0, max_bytes=10)
+    cache.put("a", response(b"12345"))
+    cache.put("b", response(b"12345"))
+    cache.put("c", response(b"12345"))
+    # oldest entry evicted to stay within max_bytes
+    assert cache.get("a") is None
+    assert cache.get("c").content == b"12345"
+    # too large to cache at all
+    cache.put("d", response(b"x" * 11))
+    assert cache.get("d") is None
+
+    cache = ResponseCache(max_age=0.0)
+    cache.put("a", response(b"1"))
+    time.sleep(0.001)
+    assert cache.get("a") is None
+
+
+def test_hedge_budget():
+    budget = HedgeBudget(window=100)
+    for _ in range(20):
+        budget.record_request()
+    assert budget.try_hedge(0.1)
+    assert budget.try_hedge(0.1)
+    assert not budget.try_hedge(0.1)
+
+
+def test_hedged_call_does_not_hedge_queued_callers():
+    resilience.hedge_stats.update(hedged=0, hedge_wins=0, over_budget=0)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def fn():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.2)
+        with lock:
+            running[0] -= 1
+        return "ok"
+
+    # more callers than the 16 hedge pool workers, none slower than the delay
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(hedged_call(fn, 0.5, 1.0)))
+        for _ in range(48)
+    ]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+    assert results == ["ok"] * 48
+    assert resilience.hedge_stats["hedged"] == 0
+    assert peak[0] > 16
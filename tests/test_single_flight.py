@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests_mock
+
+import ledgerx
+from ledgerx.http_client import HttpClient, single_flight
+from ledgerx.single_flight import AsyncSingleFlight, SingleFlight, request_key
+
+
+def test_request_key():
+    k1 = request_key("get", "https://x/", dict(a=1, b=2), {"Authorization": "JWT a"})
+    k2 = request_key("GET", "https://x/", dict(b=2, a=1), {"Authorization": "JWT a"})
+    k3 = request_key("GET", "https://x/", dict(a=1, b=2), {"Authorization": "JWT b"})
+    assert k1 == k2
+    assert k1 != k3
+    # keys follow the encoded query string
+    assert request_key("GET", "u", dict(a=[1, 2])) != request_key(
+        "GET", "u", dict(a="[1, 2]")
+    )
+    assert request_key("GET", "u", dict(a=1, b=None)) == request_key(
+        "GET", "u", dict(a="1")
+    )
+
+
+def test_single_flight_threads():
+    sf = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def fn():
+        started.set()
+        release.wait()
+        return 42
+
+    def worker():
+        results.append(sf.do("k", fn))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=worker) for _ in range(4)]
+    [t.start() for t in followers]
+    while sf.stats()["calls"] < 5:
+        time.sleep(0.001)
+    release.set()
+    [t.join() for t in [leader] + followers]
+
+    assert results == [42] * 5
+    assert sf.stats() == dict(calls=5, executed=1, coalesced=4)
+
+
+def test_single_flight_propagates_errors():
+    sf = SingleFlight()
+
+    def fn():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        sf.do("k", fn)
+    # key is released after failure
+    assert sf.do("k", lambda: 1) == 1
+
+
+def test_async_single_flight():
+    sf = AsyncSingleFlight()
+    count = 0
+
+    async def fn():
+        nonlocal count
+        count += 1
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*[sf.do("k", fn) for _ in range(5)])
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(main()) == ["ok"] * 5
+    finally:
+        loop.close()
+    assert count == 1
+    assert sf.stats() == dict(calls=5, executed=1, coalesced=4)
+
+
+def test_http_client_get_coalesced(monkeypatch):
+    monkeypatch.setattr(ledgerx, "coalesce_requests", True)
+    single_flight.reset_stats()
+    uri = "https://api.ledgerx.com/trading/contracts"
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", uri, json={"data": []})
+        assert HttpClient.get(uri).json() == {"data": []}
+    assert single_flight.stats() == dict(calls=1, executed=1, coalesced=0)
+
+
+def test_http_client_get_concurrent_calls_are_coalesced(monkeypatch):
+    monkeypatch.setattr(ledgerx, "coalesce_requests", True)
+    single_flight.reset_stats()
+    uri = "https://api.ledgerx.com/trading/contracts"
+    release = threading.Event()
+
+    def slow_response(request, context):
+        release.wait(5)
+        return {"data": [1]}
+
+    results = []
+
+    def worker():
+        results.append(HttpClient.get(uri, dict(active=True)).json())
+
+    with requests_mock.Mocker() as m:
+        m.register_uri("GET", uri, json=slow_response)
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        [t.start() for t in threads]
+        while single_flight.stats()["calls"] < 5:
+            time.sleep(0.001)
+        release.set()
+        [t.join() for t in threads]
+        assert m.call_count == 1
+
+    assert results == [{"data": [1]}] * 5
+    assert single_flight.stats() == dict(calls=5, executed=1, coalesced=4)
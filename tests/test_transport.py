@@ -0,0 +1,64 @@
+import pytest
+import requests
+import requests_mock
+
+import ledgerx
+from ledgerx.http_client import HttpClient
+from ledgerx.transport import (
+    RecordingTransport,
+    ReplayMissError,
+    ReplayTransport,
+    Transport,
+    transport_key,
+)
+
+
+def test_transport_key_ignores_param_order():
+    k1 = transport_key("get", "https://x/", dict(a=1, b=2))
+    k2 = transport_key("GET", "https://x/", dict(b=2, a=1))
+    assert k1 == k2
+    assert transport_key("GET", "u", dict(a=[1, 2])) != transport_key(
+        "GET", "u", dict(a="[1, 2]")
+    )
+
+
+def test_transport_is_abstract():
+    class IncompleteTransport(Transport):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteTransport()
+
+
+def test_record_and_replay(tmp_path, monkeypatch):
+    path = str(tmp_path / "traffic.log")
+    uri = "https://api.ledgerx.com/trading/contracts"
+
+    with requests_mock.Mocker() as m:
+        m.register_uri(
+            "GET",
+            uri,
+            [{"json": {"data": [1]}}, {"json": {"data": [2]}}],
+        )
+        m.register_uri("POST", uri, status_code=403)
+        with RecordingTransport(path) as recorder:
+            monkeypatch.setattr(ledgerx, "http_transport", recorder)
+            assert HttpClient.get(uri, dict(limit=1)).json() == {"data": [1]}
+            assert HttpClient.get(uri, dict(limit=1)).json() == {"data": [2]}
+            with pytest.raises(requests.exceptions.HTTPError):
+                HttpClient.post(uri, dict(a=1))
+
+    # no network access while replaying
+    with requests_mock.Mocker():
+        with ReplayTransport(path) as replayer:
+            monkeypatch.setattr(ledgerx, "http_transport", replayer)
+            assert HttpClient.get(uri, dict(limit=1)).json() == {"data": [1]}
+            assert HttpClient.get(uri, dict(limit=1)).json() == {"data": [2]}
+            # last response repeats once exhausted
+            assert HttpClient.get(uri, dict(limit=1)).json() == {"data": [2]}
+            with pytest.raises(requests.exceptions.HTTPError):
+                HttpClient.post(uri, dict(a=1))
+            with pytest.raises(ReplayMissError):
+                HttpClient.get(uri, dict(limit=2))
+            replayer.rewind()
+            assert HttpClient.get(uri, dict(limit=1)).json() == {"data": [1]}
@@ -9,3 +9,25 @@ def test_gen_headers():
 def test_gen_url():
     url = util.gen_url("/myurl")
     assert url == "https://api.ledgerx.com/myurl"
+
+
+def test_next_url_from_content():
+    content = b'{"meta": {"next": "https://api.ledgerx.com/x?cursor=a\\/b", "previous": null}, "data": []}'
+    assert util.next_url_from_content(content) == "https://api.ledgerx.com/x?cursor=a/b"
+    assert util.next_url_from_content(b'{"meta": {"next": null}, "data": []}') is None
+    assert util.next_url_from_content(b'{"data": []}') is None
+
+
+def test_next_url_from_content_nested_meta():
+    content = b'{"meta": {"filters": {"a": 1}, "next": "X"}, "data": []}'
+    assert util.next_url_from_content(content) == "X"
+
+
+def test_next_url_from_content_ignores_meta_in_data():
+    content = b'{"data": [{"meta": {"next": "X"}}], "meta": {"next": null}}'
+    assert util.next_url_from_content(content) is None
+    content = b'{"data": [{"meta": {"next": "X"}}], "meta": {"next": "Y"}}'
+    assert util.next_url_from_content(content) == "Y"
+    # meta neither first nor last key, falls back to a full decode
+    content = b'{"data": [{"meta": {"next": "X"}}], "meta": {"next": "Y"}, "z": 1}'
+    assert util.next_url_from_content(content) == "Y"